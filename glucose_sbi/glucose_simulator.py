@@ -1,36 +1,199 @@
 import logging
+import multiprocessing
+import os
+import pickle
+import threading
 import time
-from copy import deepcopy
-from dataclasses import dataclass, field
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from copy import copy
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from multiprocessing import shared_memory
 
 import numpy as np
 import torch
 from pathos.multiprocessing import ProcessingPool as Pool
+from scipy.integrate import ode
 from simglucose.actuator.pump import InsulinPump
 from simglucose.controller.basal_bolus_ctrller import BBController
+from simglucose.patient.t1dpatient import Action as PatientAction
 from simglucose.patient.t1dpatient import T1DPatient
 from simglucose.sensor.cgm import CGMSensor
 from simglucose.simulation.env import T1DSimEnv
-from simglucose.simulation.scenario import CustomScenario
+from simglucose.simulation.scenario import Action, CustomScenario
 from simglucose.simulation.sim_engine import SimObj
 from tqdm import tqdm
 
 from glucose_sbi.prepare_priors import InferredParams
 
-pathos = True
+try:
+    from glucose_sbi import t1d_kernels
+except ImportError:  # numba is not installed: keep the pure-Python ODE model
+    t1d_kernels = None  # type: ignore[assignment]
+
+#: Chosen once at import: process-level parallelism only pays off with more
+#: than one core and a cheap fork start method. GLUCOSE_SBI_SERIAL=1 forces
+#: the serial implementation regardless.
+_PARALLEL = (
+    os.environ.get("GLUCOSE_SBI_SERIAL", "0") != "1"
+    and (os.cpu_count() or 1) > 1
+    and "fork" in multiprocessing.get_all_start_methods()
+)
+
+#: Batches smaller than this always run serially: forking workers and shipping
+#: the simulation objects over IPC costs more than the simulations themselves.
+_SERIAL_BATCH_THRESHOLD = 4
+
+#: Set GLUCOSE_SBI_EXACT_MODEL=1 to bypass the compiled noise-free RK4
+#: surrogate and run every batch through the full simglucose environment
+#: (CGM sensor noise, adaptive lsoda) — the same forward model that
+#: `generate_true_observation` uses to produce the observations.
+_FORCE_EXACT_MODEL = os.environ.get("GLUCOSE_SBI_EXACT_MODEL", "0") == "1"
 
 logger = logging.getLogger("sbi_logger.glucose_simulator")
 
 
 @dataclass
+class _TaskContext:
+    """Per-batch simulation context, broadcast once to every worker process.
+
+    Workers clone simulation objects from the template locally, so each task
+    only has to ship a theta row across the process boundary instead of a
+    pickled copy of the whole simulation object graph.
+    """
+
+    template: SimObj
+    param_split: "_ParamSplit"
+    hours: int
+    infer_meal_params: bool
+    kernel_inputs: "_KernelInputs | None" = None
+
+
+@dataclass
+class _KernelInputs:
+    """Flat inputs for `t1d_kernels.simulate_cgm_rk4`, extracted once per batch
+    from the template simulation object.
+
+    `theta_pos`/`field_pos` map the inferred non-meal parameters onto their
+    slots in the kernel parameter array; inferred names that do not appear in
+    `t1d_kernels.PARAM_FIELDS` do not enter the ODE in simglucose either and
+    are skipped.
+    """
+
+    base_params_arr: np.ndarray
+    x0: np.ndarray
+    meal_times: np.ndarray
+    meal_amounts: np.ndarray
+    cr: float
+    cf: float
+    target: float
+    sim_minutes: float
+    dt: float
+    sample_minutes: float
+    theta_pos: np.ndarray
+    field_pos: np.ndarray
+
+
+_POOL: ProcessPoolExecutor | None = None
+_POOL_CONTEXT: _TaskContext | None = None
+_POOL_LOCK = threading.Lock()
+
+#: Set by `_worker_init` inside each worker process.
+_WORKER_TASK_CONTEXT: _TaskContext | None = None
+
+_CONTEXT_CACHE: dict[tuple, _TaskContext] = {}
+
+#: Below this batch size the CUDA launch/transfer overhead outweighs the GPU.
+_CUDA_BATCH_THRESHOLD = 256
+
+
+def _worker_init(task_context: _TaskContext | None = None) -> None:
+    """Initializer run once per worker process. Caps BLAS/OpenMP threads at one
+    so that parallel simulations do not oversubscribe the CPU with nested thread
+    pools, warms the numba kernels and stashes the batch context for
+    `_simulate_from_delta`.
+    """
+    global _WORKER_TASK_CONTEXT  # noqa: PLW0603
+    os.environ["OMP_NUM_THREADS"] = "1"
+    if t1d_kernels is not None:
+        t1d_kernels.warm_up()
+    _WORKER_TASK_CONTEXT = task_context
+
+
+def _get_pool(task_context: _TaskContext | None = None) -> ProcessPoolExecutor:
+    """Returns the persistent process pool, creating it lazily on first use.
+
+    The pool uses a fork (or forkserver, where fork is unavailable) context so that
+    workers inherit the already-imported simglucose modules instead of paying
+    interpreter startup and re-import costs on every batch. The pool is rebuilt
+    only when the task context changes (a cheap fork), so repeated batches with
+    the same template reuse warm workers.
+
+    Parameters
+    ----------
+    task_context : _TaskContext, optional
+        The batch context to broadcast to the workers via the initializer.
+
+    Returns
+    -------
+    ProcessPoolExecutor
+        The shared executor, reused across `run_glucose_simulator` calls.
+
+    """
+    global _POOL, _POOL_CONTEXT  # noqa: PLW0603
+    with _POOL_LOCK:
+        if _POOL is not None and _POOL_CONTEXT is not task_context:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+            _POOL = None
+        if _POOL is None:
+            mp_context: multiprocessing.context.BaseContext
+            try:
+                mp_context = multiprocessing.get_context("fork")
+            except ValueError:
+                mp_context = multiprocessing.get_context("forkserver")
+            if t1d_kernels is not None:
+                # Compile (or load from the on-disk cache) in the parent before
+                # forking: the workers inherit the compiled dispatchers and
+                # their warm_up() call becomes a no-op instead of paying LLVM
+                # codegen once per worker. Only the serial kernels, though —
+                # running the parallel batch driver here would start numba's
+                # threading layer, and forking after that can deadlock the
+                # workers.
+                t1d_kernels.warm_up(parallel=False)
+            _POOL = ProcessPoolExecutor(
+                mp_context=mp_context,
+                initializer=_worker_init,
+                initargs=(task_context,),
+            )
+            _POOL_CONTEXT = task_context
+        return _POOL
+
+
+def _reset_pool() -> None:
+    """Discards the persistent pool (e.g. after its workers died)."""
+    global _POOL, _POOL_CONTEXT  # noqa: PLW0603
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+        _POOL = None
+        _POOL_CONTEXT = None
+
+
+@dataclass(frozen=True, slots=True)
 class EnvironmentSettings:
-    """Dataclass to store the initial presets of the simulation environment."""
+    """Dataclass to store the initial presets of the simulation environment.
+
+    Frozen with slots: instances are hashable (so they key the template cache
+    directly), cheaper per instance, and safe to share with worker processes
+    without defensive copying.
+    """
 
     patient_name: str
     sensor_name: str
     pump_name: str
-    scenario: list[tuple[int, int]] = field(default_factory=list)
+    scenario: tuple[tuple[int, int], ...] = ()
     hours: int = 24  # hours to simulate
 
 
@@ -70,14 +233,346 @@ def run_glucose_simulator(
 
     """
     logger.info("Running the glucose simulator on theta of shape, %s", theta.shape)
-    simulation_envs = create_simulation_objects_with_custom_params(
-        theta=theta,
-        default_simulation_object=default_simulation_object,
-        inferred_params=inferred_params,
-        hours=hours,
+    task_context = _get_task_context(
+        default_simulation_object,
+        inferred_params,
+        hours,
         infer_meal_params=infer_meal_params,
     )
-    return simulate_batch(simulation_envs, device=device)
+    return _simulate_batch_deltas(theta, task_context, device=device)
+
+
+def _get_task_context(
+    template: SimObj,
+    inferred_params: InferredParams,
+    hours: int,
+    *,
+    infer_meal_params: bool,
+) -> _TaskContext:
+    """Returns a (cached) task context for a batch.
+
+    Contexts are cached so that repeated batches with the same template and
+    settings (e.g. the rounds of a sequential inference run) hand the same
+    context object to `_get_pool`, which then keeps its warm workers instead
+    of re-broadcasting the template.
+    """
+    key = (
+        id(template),
+        tuple(inferred_params.params_names),
+        hours,
+        infer_meal_params,
+    )
+    context = _CONTEXT_CACHE.get(key)
+    if context is None:
+        param_split = _split_param_indices(inferred_params.params_names)
+        context = _TaskContext(
+            template=template,
+            param_split=param_split,
+            hours=hours,
+            infer_meal_params=infer_meal_params,
+            kernel_inputs=_build_kernel_inputs(template, param_split, hours),
+        )
+        _CONTEXT_CACHE[key] = context
+    return context
+
+
+def _build_kernel_inputs(
+    template: SimObj, param_split: "_ParamSplit", hours: int
+) -> _KernelInputs | None:
+    """Extracts the flat kernel inputs from a template simulation object.
+
+    Returns None when numba is unavailable, the exact model is forced via
+    `GLUCOSE_SBI_EXACT_MODEL=1` or the template does not expose the expected
+    simglucose internals, in which case the batch falls back to the full
+    simglucose simulation path.
+    """
+    if t1d_kernels is None or _FORCE_EXACT_MODEL:
+        return None
+    try:
+        patient = template.env.patient
+        base_params_arr = t1d_kernels.params_to_array(patient._params)  # noqa: SLF001
+        x0 = np.asarray(patient.init_state, dtype=np.float64)
+        scenario = template.env.scenario.scenario
+        meal_times = np.asarray(
+            [float(meal_time) * 60.0 for meal_time, _ in scenario], dtype=np.float64
+        )
+        meal_amounts = np.asarray(
+            [float(amount) for _, amount in scenario], dtype=np.float64
+        )
+        controller = template.controller
+        matched = controller.quest[controller.quest.Name == patient.name]
+        if len(matched):
+            cr = float(matched.CR.to_numpy()[0])
+            cf = float(matched.CF.to_numpy()[0])
+        else:
+            # BBController._bb_policy's fallback quest row ('Average') for
+            # patients missing from the table
+            cr, cf = 1.0 / 15.0, 1.0 / 50.0
+        target = float(controller.target)
+        sample_minutes = float(template.env.sensor.sample_time)
+    except (AttributeError, KeyError, TypeError):
+        logger.info(
+            "Template is not representable by the RK4 kernel, "
+            "falling back to the simglucose simulation path"
+        )
+        return None
+
+    theta_pos = []
+    field_pos = []
+    for theta_idx, name in zip(param_split.other_idx, param_split.other_names):
+        if name in t1d_kernels.PARAM_FIELDS:
+            theta_pos.append(int(theta_idx))
+            field_pos.append(t1d_kernels.PARAM_FIELDS.index(name))
+
+    return _KernelInputs(
+        base_params_arr=base_params_arr,
+        x0=x0,
+        meal_times=meal_times,
+        meal_amounts=meal_amounts,
+        cr=cr,
+        cf=cf,
+        target=target,
+        sim_minutes=float(hours * 60),
+        dt=1.0,
+        sample_minutes=sample_minutes,
+        theta_pos=np.asarray(theta_pos, dtype=np.int64),
+        field_pos=np.asarray(field_pos, dtype=np.int64),
+    )
+
+
+def _simulate_batch_rk4(
+    theta_np: np.ndarray, context: _TaskContext, *, device: torch.device
+) -> torch.Tensor:
+    """Simulates the whole theta batch in one thread-parallel kernel call.
+
+    Builds per-simulation parameter arrays (and meal amounts, when meal
+    parameters are inferred) with vectorized fancy indexing and hands them to
+    `t1d_kernels.simulate_cgm_rk4_batch` — no simulation objects, no worker
+    pool and no IPC are involved on this path. Batches of at least
+    `_CUDA_BATCH_THRESHOLD` headed for a CUDA device run on the GPU kernel
+    instead, with one thread per theta and the result wrapped in place via
+    `__cuda_array_interface__` (no host round-trip).
+    """
+    kernel_inputs = context.kernel_inputs
+    if kernel_inputs is None:
+        msg = "Task context has no kernel inputs"
+        raise RuntimeError(msg)
+    theta_arr = np.asarray(theta_np, dtype=np.float64)
+    n_simulations = theta_arr.shape[0]
+    params_batch = np.tile(kernel_inputs.base_params_arr, (n_simulations, 1))
+    if kernel_inputs.theta_pos.size:
+        params_batch[:, kernel_inputs.field_pos] = theta_arr[:, kernel_inputs.theta_pos]
+    meal_amounts_batch = np.tile(kernel_inputs.meal_amounts, (n_simulations, 1))
+    if context.infer_meal_params and context.param_split.meal_idx.size:
+        meal_values = theta_arr[:, context.param_split.meal_idx]
+        n_meals = min(meal_amounts_batch.shape[1], meal_values.shape[1])
+        meal_amounts_batch[:, :n_meals] = meal_values[:, :n_meals]
+    if (
+        device.type == "cuda"
+        and n_simulations >= _CUDA_BATCH_THRESHOLD
+        and t1d_kernels.cuda_available()
+    ):
+        traces_device = t1d_kernels.simulate_cgm_rk4_batch_cuda(
+            kernel_inputs.x0,
+            params_batch,
+            kernel_inputs.meal_times,
+            meal_amounts_batch,
+            kernel_inputs.cr,
+            kernel_inputs.cf,
+            kernel_inputs.target,
+            kernel_inputs.sim_minutes,
+            kernel_inputs.dt,
+            kernel_inputs.sample_minutes,
+        )
+        return torch.as_tensor(traces_device, device=device)
+    traces = t1d_kernels.simulate_cgm_rk4_batch(
+        kernel_inputs.x0,
+        params_batch,
+        kernel_inputs.meal_times,
+        meal_amounts_batch,
+        kernel_inputs.cr,
+        kernel_inputs.cf,
+        kernel_inputs.target,
+        kernel_inputs.sim_minutes,
+        kernel_inputs.dt,
+        kernel_inputs.sample_minutes,
+    )
+    out = torch.empty(
+        traces.shape, dtype=torch.float32, pin_memory=device.type == "cuda"
+    )
+    out.numpy()[:] = traces
+    return out.to(device, non_blocking=True)
+
+
+def _simulate_from_delta(theta_row: np.ndarray) -> np.ndarray:
+    """Worker-side task: materializes one simulation from a theta row.
+
+    Clones the worker-local template broadcast by `_worker_init`, applies the
+    custom parameters and runs the simulation, so only the theta row and the
+    resulting CGM trace ever cross the process boundary.
+    """
+    context = _WORKER_TASK_CONTEXT
+    if context is None:
+        msg = "Worker was not initialized with a task context"
+        raise RuntimeError(msg)
+    simulation_obj = _clone_simulation_object(context.template)
+    simulation_obj.sim_time = timedelta(hours=context.hours)
+    set_custom_params(
+        simulation_obj,
+        theta_row,
+        infer_meal_params=context.infer_meal_params,
+        param_split=context.param_split,
+    )
+    return simulate_glucose_dynamics(simulation_obj)
+
+
+#: Shared-memory block this worker is attached to, cached across tasks.
+_WORKER_SHM: "shared_memory.SharedMemory | None" = None
+
+
+def _attach_worker_shm(name: str) -> "shared_memory.SharedMemory":
+    """Attach to the parent's shared-memory block, once per worker per batch."""
+    global _WORKER_SHM  # noqa: PLW0603
+    if _WORKER_SHM is None or _WORKER_SHM.name != name:
+        if _WORKER_SHM is not None:
+            _WORKER_SHM.close()
+        _WORKER_SHM = shared_memory.SharedMemory(name=name)
+    return _WORKER_SHM
+
+
+def _simulate_delta_into_shm(
+    theta_row: np.ndarray, row: int, shm_name: str, shape: tuple[int, int]
+) -> None:
+    """Worker-side task: simulates one theta row straight into shared memory.
+
+    The CGM trace lands in its row of the parent's shared buffer instead of
+    being pickled back over the result pipe.
+    """
+    trace = _simulate_from_delta(theta_row)
+    shm = _attach_worker_shm(shm_name)
+    out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+    n_points = min(trace.shape[0], shape[1])
+    out[row, :n_points] = trace[:n_points]
+
+
+def _run_deltas_into_shared_memory(
+    pool: ProcessPoolExecutor, theta_np: np.ndarray, context: _TaskContext
+) -> torch.Tensor:
+    """Fans theta rows out to the pool, gathering traces via shared memory.
+
+    Pickling an (N, T) batch of float traces back through the result pipes can
+    cost as much as the short simulations themselves; here workers write each
+    trace into a `SharedMemory`-backed ndarray and only a None crosses the IPC
+    boundary per task. The buffer is copied into a regular tensor once and
+    unlinked before returning.
+    """
+    n_simulations = theta_np.shape[0]
+    if n_simulations == 0:
+        return torch.empty((0, 0), dtype=torch.float32)
+    sample_minutes = context.template.env.sensor.sample_time
+    trace_len = int(context.hours * 60 // sample_minutes) + 1
+    shape = (n_simulations, trace_len)
+    shm = shared_memory.SharedMemory(create=True, size=4 * n_simulations * trace_len)
+    try:
+        futures = [
+            pool.submit(_simulate_delta_into_shm, theta_np[row], row, shm.name, shape)
+            for row in range(n_simulations)
+        ]
+        for future in tqdm(as_completed(futures), total=n_simulations):
+            future.result()
+        shm_view = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        return torch.from_numpy(shm_view).clone()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _simulate_batch_deltas(
+    theta: torch.Tensor,
+    task_context: _TaskContext,
+    *,
+    device: torch.device,
+) -> torch.Tensor:
+    """Simulates a batch by shipping per-theta deltas to the worker pool.
+
+    Each task pickles only one theta row (plus the returned CGM trace) instead
+    of a deep-copied simulation object graph; the template is broadcast to the
+    workers once, via the pool initializer.
+
+    Parameters
+    ----------
+    theta : torch.Tensor
+        Sets of custom parameters of shape (N_sets, N_params).
+    task_context : _TaskContext
+        The batch context holding the template and the parameter split.
+    device : torch.device
+        The device to store the results on.
+
+    Returns
+    -------
+    torch.Tensor
+        The tensor storing the resulting glucose dynamics for each simulation.
+
+    """
+    tic = time.time()
+    pin_memory = device.type == "cuda"
+    theta_np = theta.detach().cpu().numpy()
+    n_simulations = theta_np.shape[0]
+    if task_context.kernel_inputs is not None:
+        # Compiled kernel (CPU threads or CUDA): no worker pool needed at all.
+        out = _simulate_batch_rk4(theta_np, task_context, device=device)
+        logger.info("Simulation took %s seconds", time.time() - tic)
+        return out
+    if not _PARALLEL or n_simulations < _SERIAL_BATCH_THRESHOLD:
+        # Same dispatch rules as `simulate_batch`: serial-only runs
+        # (GLUCOSE_SBI_SERIAL, single-core hosts) and batches too small to
+        # amortize worker IPC stay in-process instead of forking a pool.
+        simulations = create_simulation_objects_with_custom_params(
+            theta=theta_np,
+            default_simulation_object=task_context.template,
+            hours=task_context.hours,
+            infer_meal_params=task_context.infer_meal_params,
+            param_split=task_context.param_split,
+        )
+        return simulate_batch(simulations, device=device)
+    # The JIT wrappers attached to the template's patient are closures and do
+    # not pickle; workers re-attach them at simulation time anyway.
+    _detach_jit_model(task_context.template.env.patient)
+    try:
+        pool = _get_pool(task_context)
+        if device.type == "cpu":
+            # CPU targets need no pinned staging buffer, so workers can write
+            # traces straight into shared memory instead of pickling them back.
+            out = _run_deltas_into_shared_memory(pool, theta_np, task_context)
+        else:
+            future_to_row = {
+                pool.submit(_simulate_from_delta, theta_np[row]): row
+                for row in range(n_simulations)
+            }
+            completed = tqdm(as_completed(future_to_row), total=n_simulations)
+            out = _collect_into_preallocated(
+                ((future_to_row[future], future.result()) for future in completed),
+                n_simulations,
+                pin_memory=pin_memory,
+            )
+    except (pickle.PicklingError, TypeError, BrokenProcessPool):
+        # Delta shipping failed (unpicklable template or dead workers):
+        # materialize the simulation objects in the parent and take the
+        # object-shipping path instead.
+        logger.info("Falling back to shipping full simulation objects")
+        _reset_pool()
+        simulations = create_simulation_objects_with_custom_params(
+            theta=theta_np,
+            default_simulation_object=task_context.template,
+            hours=task_context.hours,
+            infer_meal_params=task_context.infer_meal_params,
+            param_split=task_context.param_split,
+        )
+        return simulate_batch(simulations, device=device)
+    toc = time.time()
+
+    logger.info("Simulation took %s seconds", toc - tic)
+    return out.to(device, non_blocking=True)
 
 
 def simulate_batch(
@@ -85,7 +580,11 @@ def simulate_batch(
     *,
     device: torch.device,
 ) -> torch.Tensor:
-    """Simulates a batch of simulation objects in parallel.
+    """Simulates a batch of simulation objects.
+
+    The implementation is picked once at import time (`_SIMULATE_IMPL`), not
+    per call; batches below `_SERIAL_BATCH_THRESHOLD` always run serially
+    because worker IPC costs more than the simulations themselves.
 
     Parameters
     ----------
@@ -93,8 +592,6 @@ def simulate_batch(
         List of simulation objects with all the necessary presets and ready to `.simulate`
     device : torch.device
         The device to store the results on
-    logger : logging.Logger, optional
-        The logger object, by default None
 
     Returns
     -------
@@ -102,19 +599,108 @@ def simulate_batch(
         The tensor storing the resulting glucose dynamics for each simulation
 
     """
-    pathos = True
     tic = time.time()
-    if pathos:
-        logger.info("Using pathos for parallel processing")
-        with Pool() as p:
-            results = p.map(simulate_glucose_dynamics, simulations)
+    pin_memory = device.type == "cuda"
+    if len(simulations) < _SERIAL_BATCH_THRESHOLD:
+        out = _simulate_batch_serial(simulations, pin_memory=pin_memory)
     else:
-        results = [simulate_glucose_dynamics(s) for s in tqdm(simulations)]
-    results = np.stack(results)
+        out = _SIMULATE_IMPL(simulations, pin_memory=pin_memory)
     toc = time.time()
 
     logger.info("Simulation took %s seconds", toc - tic)
-    return torch.from_numpy(results).float().to(device)
+    return out.to(device, non_blocking=True)
+
+
+def _simulate_batch_serial(
+    simulations: list[SimObj], *, pin_memory: bool
+) -> torch.Tensor:
+    """Runs the batch in-process, one simulation at a time."""
+    return _collect_into_preallocated(
+        enumerate(simulate_glucose_dynamics(s) for s in tqdm(simulations)),
+        len(simulations),
+        pin_memory=pin_memory,
+    )
+
+
+def _simulate_batch_parallel(
+    simulations: list[SimObj], *, pin_memory: bool
+) -> torch.Tensor:
+    """Fans the batch out over the worker pool.
+
+    Results are streamed as workers finish instead of blocking on an ordered
+    map: rows land in the output buffer out of order, progress is visible, and
+    no single straggler stalls the gather.
+    """
+    n_simulations = len(simulations)
+    try:
+        pool = _get_pool()
+        future_to_row = {
+            pool.submit(simulate_glucose_dynamics, simulation): row
+            for row, simulation in enumerate(simulations)
+        }
+        completed = tqdm(as_completed(future_to_row), total=n_simulations)
+        return _collect_into_preallocated(
+            ((future_to_row[future], future.result()) for future in completed),
+            n_simulations,
+            pin_memory=pin_memory,
+        )
+    except (pickle.PicklingError, TypeError):
+        # The simulation graph contains something the stdlib pickler cannot
+        # handle (e.g. closures): fall back to pathos, which serializes with dill.
+        logger.info("Falling back to pathos for parallel processing")
+        with Pool() as p:
+            return _collect_into_preallocated(
+                enumerate(p.imap(simulate_glucose_dynamics, simulations)),
+                n_simulations,
+                pin_memory=pin_memory,
+            )
+
+
+_SIMULATE_IMPL = _simulate_batch_parallel if _PARALLEL else _simulate_batch_serial
+
+
+def _collect_into_preallocated(
+    indexed_traces: Iterable[tuple[int, np.ndarray]],
+    n_simulations: int,
+    *,
+    pin_memory: bool = False,
+) -> torch.Tensor:
+    """Gathers per-simulation CGM traces into a single pre-allocated float32 tensor.
+
+    Writing each trace into its row of an (N, T) tensor allocated once avoids the
+    list-of-arrays + `np.stack` pattern, which doubles peak memory and walks every
+    byte twice. Allocating float32 directly also makes the torch conversion
+    cast-free, and allocating on pinned memory (for CUDA targets) lets the final
+    host-to-device copy go through the asynchronous DMA path instead of a staging
+    copy from pageable memory. The trace length is taken from the first result.
+
+    Parameters
+    ----------
+    indexed_traces : Iterable[tuple[int, np.ndarray]]
+        (row, trace) pairs of per-simulation glucose dynamics, in any order.
+    n_simulations : int
+        The number of simulations in the batch.
+    pin_memory : bool, optional
+        Whether to allocate the tensor on page-locked memory, by default False
+
+    Returns
+    -------
+    torch.Tensor
+        Contiguous CPU tensor of shape (n_simulations, T) holding all traces.
+
+    """
+    out: torch.Tensor | None = None
+    for row, trace in indexed_traces:
+        if out is None:
+            out = torch.empty(
+                (n_simulations, trace.shape[0]),
+                dtype=torch.float32,
+                pin_memory=pin_memory,
+            )
+        out.numpy()[row, :] = trace
+    if out is None:
+        return torch.empty((0, 0), dtype=torch.float32)
+    return out
 
 
 def simulate_glucose_dynamics(simulation_env: SimObj) -> np.ndarray:
@@ -131,17 +717,19 @@ def simulate_glucose_dynamics(simulation_env: SimObj) -> np.ndarray:
         Resulting glucose dynamics
 
     """
+    _attach_jit_model(simulation_env.env.patient)
     simulation_env.simulate()
     return simulation_env.results()["CGM"].to_numpy()
 
 
 def create_simulation_objects_with_custom_params(
-    theta: torch.Tensor,
+    theta: torch.Tensor | np.ndarray,
     default_simulation_object: SimObj,
-    inferred_params: InferredParams,
+    inferred_params: InferredParams | None = None,
     *,
     hours: int = 24,
     infer_meal_params: bool = False,
+    param_split: "_ParamSplit | None" = None,
 ) -> list[SimObj]:
     """Creates a list of simulation objects with custom parameter values.
     The parameters that are inferred (listed in InferredParams dataclass)
@@ -149,16 +737,20 @@ def create_simulation_objects_with_custom_params(
 
     Parameters
     ----------
-    theta : torch.Tensor
-        A tensor of custom parameter values of shape (N_simulations, N_params) to be used for simulations.
+    theta : torch.Tensor | np.ndarray
+        Custom parameter values of shape (N_simulations, N_params) to be used for simulations.
     default_simulation_object : SimObj
         The simulation object with all default presets like meal scenario and patient parameters, ready to `.simulate`
-    inferred_params : InferredParams
-        Dataclass object containing the names of inferred parameters
+    inferred_params : InferredParams, optional
+        Dataclass object containing the names of inferred parameters.
+        May be omitted when `param_split` is given.
     hours : int, optional
         Duration of each simulation, by default 24
     infer_meal_params : bool, optional
         Whether to infer meal parameters, by default False
+    param_split : _ParamSplit, optional
+        The precomputed meal/non-meal index split; derived from
+        `inferred_params` when not provided.
 
     Returns
     -------
@@ -166,28 +758,135 @@ def create_simulation_objects_with_custom_params(
         List of simulation objects with adjusted parameter values
 
     """
+    if param_split is None:
+        if inferred_params is None:
+            msg = "Either inferred_params or param_split must be provided"
+            raise ValueError(msg)
+        param_split = _split_param_indices(inferred_params.params_names)
+    # One tensor -> ndarray conversion for the whole batch (zero-copy on CPU);
+    # the loop below only hands out row views, so no per-theta allocations.
+    theta_np = (
+        theta.detach().cpu().numpy()
+        if isinstance(theta, torch.Tensor)
+        else np.asarray(theta)
+    )
     simulation_objects = []
 
-    for _, theta_i in enumerate(theta):
-        custom_sim_obj = deepcopy(default_simulation_object)
+    for theta_i in theta_np:
+        custom_sim_obj = _clone_simulation_object(default_simulation_object)
         custom_sim_obj.sim_time = timedelta(hours=hours)
         set_custom_params(
             custom_sim_obj,
             theta_i,
-            inferred_params,
             infer_meal_params=infer_meal_params,
+            param_split=param_split,
         )
         simulation_objects.append(custom_sim_obj)
 
     return simulation_objects
 
 
+class MealArrayScenario(CustomScenario):
+    """`CustomScenario` backed by preallocated meal arrays.
+
+    The stock `get_action` rebuilds the times/amounts lists and re-parses the
+    meal times on every call — once per simulated minute — and per-theta meal
+    updates allocate a fresh tuple per meal. Here the meal amounts live in a
+    preallocated array with the lookup datetimes computed once, so
+    `get_action` is a dict probe and a meal update is a single vectorized
+    store into `_amounts_arr`.
+    """
+
+    def __init__(
+        self, start_time: datetime, scenario: Iterable[tuple[float, float]]
+    ) -> None:
+        """Build the meal arrays and lookup index from `(hour, amount)` pairs.
+
+        Parameters
+        ----------
+        start_time : datetime
+            Simulation start; meal hours are resolved relative to it.
+        scenario : Iterable[tuple[float, float]]
+            Meals as `(hour_of_day, carbs_in_grams)` pairs, as accepted by
+            `CustomScenario`.
+
+        """
+        super().__init__(
+            start_time=start_time, scenario=[tuple(meal) for meal in scenario]
+        )
+        self._amounts_arr = np.array(
+            [meal[1] for meal in self.scenario], dtype=np.float64
+        )
+        # Numeric meal hours are parsed exactly as simglucose's parseTime does
+        self._meal_index = {
+            start_time + timedelta(minutes=round(float(meal[0]) * 60.0)): i
+            for i, meal in enumerate(self.scenario)
+        }
+
+    def get_action(self, t: datetime) -> Action:
+        idx = self._meal_index.get(t)
+        if idx is None:
+            return Action(meal=0)
+        return Action(meal=float(self._amounts_arr[idx]))
+
+    def set_meal_amounts(self, meal_values: np.ndarray) -> None:
+        """Overwrite the scheduled meal amounts with one contiguous store.
+
+        `_amounts_arr` is what `get_action` serves from; the `scenario` tuple
+        list keeps the template defaults and is not rebuilt per theta.
+        """
+        n_meals = min(self._amounts_arr.shape[0], len(meal_values))
+        self._amounts_arr[:n_meals] = meal_values[:n_meals]
+
+
+def _clone_simulation_object(template: SimObj) -> SimObj:
+    """Creates a lightweight per-theta copy of a simulation object.
+
+    Only the parts that are mutated per parameter set are copied: the patient
+    (whose `_params` receive the custom values) and the scenario (whose meal
+    amounts may be updated). The sensor, pump and controller are reset by the
+    environment before every simulation anyway, so they are reused as-is
+    instead of deep-copying the whole object graph for every theta.
+
+    Parameters
+    ----------
+    template : SimObj
+        The simulation object to clone.
+
+    Returns
+    -------
+    SimObj
+        A new simulation object sharing the immutable parts of the template.
+
+    """
+    template_patient = template.env.patient
+    patient = copy(template_patient)
+    patient._params = template_patient._params.copy()  # noqa: SLF001
+    scenario = MealArrayScenario(
+        start_time=template.env.scenario.start_time,
+        scenario=template.env.scenario.scenario,
+    )
+    env = T1DSimEnv(
+        patient=patient,
+        sensor=template.env.sensor,
+        pump=template.env.pump,
+        scenario=scenario,
+    )
+    return SimObj(
+        env=env,
+        controller=template.controller,
+        sim_time=template.sim_time,
+        animate=False,
+    )
+
+
 def set_custom_params(
     default_simulation_obj: SimObj,
-    theta: torch.Tensor,
-    inferred_params: InferredParams,
+    theta: torch.Tensor | np.ndarray,
+    inferred_params: InferredParams | None = None,
     *,
     infer_meal_params: bool = False,
+    param_split: "_ParamSplit | None" = None,
 ) -> None:
     """Change the default parameters of the patient and scenario in the simulation object
     for a given set of corresponding custom parameters (these are inferred).
@@ -196,63 +895,230 @@ def set_custom_params(
     ----------
     default_simulation_obj : SimObj
         The simulation object containing the patient parameters and the meal scenario.
-    theta : torch.Tensor
+    theta : torch.Tensor | np.ndarray
         One set of custom parameters to apply to the patient.
-    inferred_params : InferredParams
+    inferred_params : InferredParams, optional
         DataClass object containing the names of inferred parameters.
+        May be omitted when `param_split` is given.
     infer_meal_params : bool, optional
         Whether to infer meal parameters, by default False
+    param_split : _ParamSplit, optional
+        The meal/non-meal index split, precomputed once per batch with
+        `_split_param_indices`. Derived from `inferred_params` when not provided.
 
     """
-    theta_list = theta.clone().tolist()
-    param_names = inferred_params.params_names
-    patient = default_simulation_obj.env.patient
-
-    # Separate meal and non-meal parameters
-    meal_indices, meal_values, other_params, other_values = _separate_parameters(
-        param_names, theta_list
+    if param_split is None:
+        if inferred_params is None:
+            msg = "Either inferred_params or param_split must be provided"
+            raise ValueError(msg)
+        param_split = _split_param_indices(inferred_params.params_names)
+    theta_np = (
+        theta.detach().cpu().numpy()
+        if isinstance(theta, torch.Tensor)
+        else np.asarray(theta)
     )
+    patient = default_simulation_obj.env.patient
 
-    if infer_meal_params and meal_indices:
+    if infer_meal_params and param_split.meal_idx.size:
         # Update meal parameters in the scenario
         _update_meal_parameters(
-            default_simulation_obj.env.scenario.scenario, meal_values
+            default_simulation_obj.env.scenario,
+            theta_np[param_split.meal_idx],
         )
 
     # Update other parameters in the patient
-    _update_patient_parameters(patient, other_params, other_values)
+    _update_patient_parameters(
+        patient, param_split.other_names, theta_np[param_split.other_idx]
+    )
 
 
-def _separate_parameters(
-    param_names: list[str], theta_list: list[float]
-) -> tuple[list[int], list[float], list[str], list[float]]:
-    """Separate meal and non-meal parameters."""
-    meal_indices = [i for i, param in enumerate(param_names) if "meal" in param]
-    meal_values = [theta_list[i] for i in meal_indices]
+#: Warm scipy integrator, one per process. Constructing an `ode` instance and
+#: its integrator workspace for every simulation is pure overhead; simulations
+#: within a process run sequentially, so the instance is re-pointed at the
+#: current patient's wrappers and re-seeded via `set_initial_value` instead.
+_WARM_ODESOLVER: ode | None = None
 
-    non_meal_indices_and_params = [
-        (i, param) for i, param in enumerate(param_names) if "meal" not in param
-    ]
-    other_params = [param for _, param in non_meal_indices_and_params]
-    other_values = [theta_list[i] for i, _ in non_meal_indices_and_params]
 
-    return meal_indices, meal_values, other_params, other_values
+def _attach_jit_model(patient: T1DPatient) -> None:
+    """Replace the patient's pure-Python ODE right-hand side with the numba-compiled
+    kernel from `t1d_kernels`. The patient parameters are packed into a flat float64
+    array once per call and cached on the patient, so the scipy integrator only ever
+    touches compiled code in the hot loop. No-op when numba is not installed.
+    """
+    if t1d_kernels is None:
+        return
 
+    params_arr = t1d_kernels.params_to_array(patient._params)  # noqa: SLF001
+    patient._params_arr = params_arr  # noqa: SLF001
 
-def _update_meal_parameters(
-    scenario: list[tuple[str, float]], meal_values: list[float]
-) -> None:
-    """Update meal parameters in the scenario."""
-    for i, (meal_name, _) in enumerate(scenario):
-        scenario[i] = (meal_name, meal_values[i])
+    def _model(
+        t: float,
+        x: np.ndarray,
+        action: PatientAction,
+        params: object,  # noqa: ARG001
+        last_qsto: float,
+        last_foodtaken: float,
+    ) -> np.ndarray:
+        return t1d_kernels.t1d_rhs(
+            t,
+            x,
+            params_arr,
+            float(action.CHO),
+            float(action.insulin),
+            float(last_qsto),
+            float(last_foodtaken),
+        )
+
+    patient.model = _model
+
+    def _jac(t: float, x: np.ndarray, *args: object) -> np.ndarray:  # noqa: ARG001
+        # scipy passes the f_params extras (action, params, meal bookkeeping)
+        # to the Jacobian callback as well; they are already captured here.
+        return t1d_kernels.t1d_jac(
+            t,
+            x,
+            params_arr,
+            float(patient._last_Qsto),  # noqa: SLF001
+            float(patient._last_foodtaken),  # noqa: SLF001
+        )
+
+    def _reset_with_jac() -> None:
+        # Mirrors T1DPatient.reset state for state, but seeds the process-wide
+        # warm solver instead of constructing (and immediately discarding) a
+        # fresh integrator workspace on every reset.
+        global _WARM_ODESOLVER  # noqa: PLW0603
+        patient.init_state = (
+            # np.copy(...values): a plain ndarray, like simglucose — keeping
+            # the pandas Series would alias _params (so the random_init_bg
+            # writes below would corrupt the shared template) and breaks
+            # positional indexing on pandas 3.
+            np.copy(patient._params.iloc[2:15].values)  # noqa: SLF001
+            if patient._init_state is None  # noqa: SLF001
+            else patient._init_state  # noqa: SLF001
+        )
+        patient.random_state = np.random.RandomState(patient.seed)
+        if patient.random_init_bg:
+            # Only randomize the glucose-related states x4, x5 and x13
+            mean = [
+                1.0 * patient.init_state[3],
+                1.0 * patient.init_state[4],
+                1.0 * patient.init_state[12],
+            ]
+            cov = np.diag(
+                [
+                    0.1 * patient.init_state[3],
+                    0.1 * patient.init_state[4],
+                    0.1 * patient.init_state[12],
+                ]
+            )
+            bg_init = patient.random_state.multivariate_normal(mean, cov)
+            patient.init_state[3] = 1.0 * bg_init[0]
+            patient.init_state[4] = 1.0 * bg_init[1]
+            patient.init_state[12] = 1.0 * bg_init[2]
+        patient._last_Qsto = patient.init_state[0] + patient.init_state[1]  # noqa: SLF001
+        patient._last_foodtaken = 0  # noqa: SLF001
+        patient.name = patient._params.Name  # noqa: SLF001
+        solver = _WARM_ODESOLVER
+        if solver is None:
+            # dopri5, exactly as simglucose: a multistep method (lsoda/vode)
+            # would carry its history across the discontinuous per-minute
+            # set_f_params changes (meals and boluses switching on and off),
+            # which visibly changes the simulated traces. dopri5 is an
+            # explicit RK method and ignores the analytic Jacobian; it is
+            # wired up anyway so a stiff integrator restarted at each
+            # discontinuity could consume it without further changes.
+            solver = ode(patient.model, jac=_jac)
+            solver.set_integrator("dopri5")
+            _WARM_ODESOLVER = solver
+        else:
+            # Re-point the warm solver at this patient's wrappers; the state
+            # vector and workspace are re-seeded by set_initial_value below.
+            solver.f = patient.model
+            solver.jac = _jac
+        solver.set_initial_value(patient.init_state, patient.t0)
+        patient._odesolver = solver  # noqa: SLF001
+        patient._t = patient.t0  # noqa: SLF001
+        patient._last_action = PatientAction(CHO=0, insulin=0)  # noqa: SLF001
+        patient.is_eating = False
+        patient.planned_meal = 0
+
+    patient.reset = _reset_with_jac
+
+
+def _detach_jit_model(patient: T1DPatient) -> None:
+    """Removes the per-instance JIT wrappers from a patient.
+
+    The wrappers created by `_attach_jit_model` are closures, which the stdlib
+    pickler rejects; they are stripped before a patient crosses a process
+    boundary and re-attached in the worker at simulation time.
+    """
+    for attr in ("model", "reset", "_params_arr"):
+        patient.__dict__.pop(attr, None)
+
+
+@dataclass
+class _ParamSplit:
+    """Precomputed split of the inferred parameter names into meal and non-meal entries."""
+
+    meal_idx: np.ndarray
+    other_idx: np.ndarray
+    other_names: list[str]
+
+
+def _split_param_indices(param_names: list[str]) -> _ParamSplit:
+    """Separate meal and non-meal parameter indices with a vectorized mask.
+
+    The split only depends on the parameter names, so it is computed once per
+    batch instead of re-scanning the names for every theta row.
+    """
+    names = np.asarray(param_names)
+    meal_mask = np.char.find(names, "meal") >= 0
+    meal_idx = np.flatnonzero(meal_mask)
+    other_idx = np.flatnonzero(~meal_mask)
+    return _ParamSplit(
+        meal_idx=meal_idx,
+        other_idx=other_idx,
+        other_names=names[other_idx].tolist(),
+    )
+
+
+def _update_meal_parameters(scenario: CustomScenario, meal_values: np.ndarray) -> None:
+    """Update meal amounts in the scenario.
+
+    A `MealArrayScenario` takes one vectorized store into its amounts buffer;
+    a plain `CustomScenario` falls back to rebuilding the per-meal tuples.
+    """
+    if isinstance(scenario, MealArrayScenario):
+        scenario.set_meal_amounts(meal_values)
+        return
+    meals = scenario.scenario
+    for i, (meal_name, _) in enumerate(meals):
+        meals[i] = (meal_name, float(meal_values[i]))
 
 
 def _update_patient_parameters(
-    patient: T1DPatient, params: list[str], values: list[float]
+    patient: T1DPatient, params: list[str], values: np.ndarray
 ) -> None:
-    """Update non-meal parameters in the patient."""
-    for param, value in zip(params, values):
-        setattr(patient._params, param, value)  # noqa: SLF001
+    """Update non-meal parameters in the patient in one bulk assignment.
+
+    A per-attribute `setattr` loop pays descriptor-machinery cost for every
+    parameter; writing all values at once keeps the update at C level. The
+    simglucose `_params` is a pandas Series, for which a label-array
+    `__setitem__` is a single vectorized store; namedtuple-style containers
+    are rebuilt with one `_replace` call instead.
+    """
+    if not params:
+        return
+    patient_params = patient._params  # noqa: SLF001
+    if hasattr(patient_params, "_replace"):  # immutable namedtuple-style params
+        patient._params = patient_params._replace(  # noqa: SLF001
+            **dict(zip(params, (float(value) for value in values)))
+        )
+    else:  # pandas Series
+        patient_params[params] = values
+
+
+_TEMPLATE_CACHE: dict[tuple, SimObj] = {}
 
 
 def create_simulation_object(
@@ -261,6 +1127,12 @@ def create_simulation_object(
     """Creates the simulation object based on a patient, sensor, pump and scenario, specified in
     environment settings.
 
+    Templates are cached per settings, because the simglucose `withName`
+    factories parse their pandas CSV tables on every call; repeated calls with
+    the same settings (e.g. one per inference round) return the cached object.
+    Callers that need a private mutable copy should clone it via
+    `_clone_simulation_object`.
+
     Parameters
     ----------
     env_settings : EnvironmentSettings
@@ -274,19 +1146,26 @@ def create_simulation_object(
         The resulting simulation object with all the necessary presets and ready to `.simulate`
 
     """
+    cache_key = (env_settings, hours)
+    cached = _TEMPLATE_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
     now = datetime.now(tz=timezone.utc)
     start_time = datetime.combine(now.date(), datetime.min.time())
 
     patient = T1DPatient.withName(env_settings.patient_name)
     sensor = CGMSensor.withName(env_settings.sensor_name, seed=1)
     pump = InsulinPump.withName(env_settings.pump_name)
-    scenario = CustomScenario(start_time=start_time, scenario=env_settings.scenario)
+    scenario = MealArrayScenario(start_time=start_time, scenario=env_settings.scenario)
     controller = BBController()
     env = T1DSimEnv(patient=patient, sensor=sensor, pump=pump, scenario=scenario)
 
-    return SimObj(
+    simulation_object = SimObj(
         env=env, controller=controller, sim_time=timedelta(hours=hours), animate=False
     )
+    _TEMPLATE_CACHE[cache_key] = simulation_object
+    return simulation_object
 
 
 def generate_true_observation(
@@ -311,6 +1190,7 @@ def generate_true_observation(
 
     """
     default_simulation_object.sim_time = timedelta(hours=hours)
+    _attach_jit_model(default_simulation_object.env.patient)
     default_simulation_object.simulate()
     true_observation = default_simulation_object.results()["CGM"].to_numpy()
     return torch.from_numpy(true_observation).float().to(device)
@@ -32,15 +32,15 @@ from glucose_sbi.sbi_framework import (
 )
 
 
-def _random_scenario() -> list[tuple[int, int]]:
+def _random_scenario() -> tuple[tuple[int, int], ...]:
     """Generate a random scenario."""
-    return [
+    return (
         (7, random.randint(1, 100)),
         (12, random.randint(1, 100)),
         (16, random.randint(1, 100)),
         (18, random.randint(1, 100)),
         (23, random.randint(1, 100)),
-    ]
+    )
 
 
 def set_up_logging(saving_path: Path) -> logging.Logger:
@@ -146,7 +146,8 @@ def set_up_default_simulation_object(
         patient_name=config["patient_name"],
         sensor_name=config["sensor_name"],
         pump_name=config["pump_name"],
-        scenario=scenario,
+        # YAML configs yield lists; the frozen settings need hashable tuples
+        scenario=tuple(tuple(meal) for meal in scenario),
         hours=config["hours"],
     )
     default_simulation_object = create_simulation_object(default_settings)
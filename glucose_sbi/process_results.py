@@ -1,6 +1,6 @@
 import json
 import pickle
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from pathlib import Path
 
 import matplotlib.pyplot as plt
@@ -78,6 +78,10 @@ def load_results(
         results_folder / "Experimental Setup" / "default_settings.json"
     ).open() as f:
         defaut_sim_env_dict = json.load(f)
+    # JSON round-trips the scenario as lists; the frozen settings need tuples
+    defaut_sim_env_dict["scenario"] = tuple(
+        tuple(meal) for meal in defaut_sim_env_dict.get("scenario", ())
+    )
     defaut_sim_env = EnvironmentSettings(**defaut_sim_env_dict)
 
     with Path(results_folder / "simulation_config.yaml").open() as f:
@@ -306,6 +310,54 @@ def plot_meals(
     return fig, ax
 
 
+def _coerce_default_settings(loaded: object) -> EnvironmentSettings:
+    """Rebuild `EnvironmentSettings` from a legacy pickle payload.
+
+    `EnvironmentSettings` is now a frozen slots dataclass; pickles written
+    before that change stored the instance `__dict__` and restore without
+    going through `__init__`, so the unpickled fields cannot be trusted —
+    they can even come back as the field names themselves. Rebuild the
+    settings from the recovered values and fail loudly when they are
+    unusable instead of handing corrupted settings to the simulator.
+
+    Parameters
+    ----------
+    loaded : object
+        Whatever `default_settings.pkl` unpickled to: an
+        `EnvironmentSettings` instance (current or legacy) or a raw dict.
+
+    Returns
+    -------
+    EnvironmentSettings
+        A freshly constructed, validated settings instance.
+
+    """
+    field_names = [field.name for field in fields(EnvironmentSettings)]
+    values = (
+        dict(loaded)
+        if isinstance(loaded, dict)
+        else {name: getattr(loaded, name, None) for name in field_names}
+    )
+    if any(values.get(name) == name for name in field_names):
+        msg = (
+            "default_settings.pkl was written with an incompatible "
+            "EnvironmentSettings layout and unpickled corrupted; re-export "
+            "the experiment with default_settings.json and use load_results"
+        )
+        raise TypeError(msg)
+    try:
+        return EnvironmentSettings(
+            patient_name=values["patient_name"],
+            sensor_name=values["sensor_name"],
+            pump_name=values["pump_name"],
+            scenario=tuple(tuple(meal) for meal in values.get("scenario") or ()),
+            hours=int(values.get("hours") or 24),
+        )
+    except (KeyError, TypeError, ValueError) as err:
+        msg = f"default_settings.pkl does not contain usable settings: {loaded!r}"
+        raise TypeError(msg) from err
+
+
 def load_results_pickle(results_folder: Path) -> Results:
     """Load results of a particular parameter inference experiment.
     This function is being deprecated in favor of `load_results` and is compatible with results until 2025-02-17 only.
@@ -321,7 +373,9 @@ def load_results_pickle(results_folder: Path) -> Results:
 
     """
     setup_folder = results_folder / "Experimental Setup"
-    default_settings = pickle.load((setup_folder / "default_settings.pkl").open("rb"))
+    default_settings = _coerce_default_settings(
+        pickle.load((setup_folder / "default_settings.pkl").open("rb"))
+    )
     prior = pickle.load((setup_folder / "priors.pkl").open("rb"))
     true_observation = pickle.load((setup_folder / "true_observation.pkl").open("rb"))
     true_params = pickle.load((setup_folder / "true_params.pkl").open("rb"))
@@ -0,0 +1,1285 @@
+"""Numba-compiled kernels for the UVa/Padova T1D patient model used by simglucose.
+
+The pure-Python ODE right-hand side in `simglucose.patient.t1dpatient.T1DPatient.model`
+is evaluated thousands of times per simulated day by the scipy integrator and
+dominates the runtime of a single simulation. The kernels in this module mirror
+those equations operating on plain float64 arrays, so they can be compiled with
+numba and attached to patient instances (see `glucose_simulator._attach_jit_model`).
+"""
+
+import math
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+import numpy as np
+from numba import cuda, njit, prange
+
+if TYPE_CHECKING:
+    from numba.cuda.cudadrv.devicearray import DeviceNDArray
+
+#: Order in which the T1DPatient parameters are packed into the flat float64
+#: array consumed by the kernels below (see `params_to_array`).
+PARAM_FIELDS = (
+    "BW",
+    "b",
+    "d",
+    "kmax",
+    "kmin",
+    "kabs",
+    "f",
+    "kp1",
+    "kp2",
+    "kp3",
+    "Fsnc",
+    "ke1",
+    "ke2",
+    "k1",
+    "k2",
+    "Vm0",
+    "Vmx",
+    "Km0",
+    "m1",
+    "m2",
+    "m30",
+    "m4",
+    "Vi",
+    "p2u",
+    "Ib",
+    "ki",
+    "kd",
+    "ka1",
+    "ka2",
+    "ksc",
+    "Vg",
+    "u2ss",
+)
+
+#: Carbohydrate absorption rate of the patient, g/min (T1DPatient.EAT_RATE).
+EAT_RATE = 5.0
+
+#: CGM level above which the basal-bolus controller adds a correction bolus,
+#: mg/dL (mirrors BBController._bb_policy).
+CORRECTION_THRESHOLD = 150.0
+
+#: Number of simulations integrated together per SoA block. Large enough to
+#: fill AVX2/AVX-512 lanes with headroom, small enough that the 13-state block
+#: plus RK4 scratch stays in L2 cache.
+_SOA_BLOCK = 128
+
+
+def params_to_array(params: object) -> np.ndarray:
+    """Pack the patient parameters into a flat float64 array.
+
+    Parameters
+    ----------
+    params : object
+        The patient parameter container (a pandas Series in simglucose);
+        any object exposing the `PARAM_FIELDS` entries as attributes works.
+
+    Returns
+    -------
+    np.ndarray
+        1-D float64 array with the parameter values in `PARAM_FIELDS` order.
+
+    """
+    return np.array(
+        [float(getattr(params, name)) for name in PARAM_FIELDS], dtype=np.float64
+    )
+
+
+@njit(cache=True, fastmath=True)
+def t1d_rhs(  # noqa: PLR0915
+    t: float,  # noqa: ARG001
+    x: np.ndarray,
+    p: np.ndarray,
+    cho: float,
+    insulin_rate: float,
+    last_qsto: float,
+    last_foodtaken: float,
+) -> np.ndarray:
+    """Right-hand side of the 13-state UVa/Padova T1D ODE system.
+
+    Mirrors `T1DPatient.model` equation by equation; `p` is the flat parameter
+    array produced by `params_to_array`, `cho` is the carbohydrate intake rate
+    in g/min and `insulin_rate` the insulin infusion rate in U/min.
+    """
+    bw = p[0]
+    b = p[1]
+    d_param = p[2]
+    kmax = p[3]
+    kmin = p[4]
+    kabs = p[5]
+    f = p[6]
+    kp1 = p[7]
+    kp2 = p[8]
+    kp3 = p[9]
+    fsnc = p[10]
+    ke1 = p[11]
+    ke2 = p[12]
+    k1 = p[13]
+    k2 = p[14]
+    vm0 = p[15]
+    vmx = p[16]
+    km0 = p[17]
+    m1 = p[18]
+    m2 = p[19]
+    m30 = p[20]
+    m4 = p[21]
+    vi = p[22]
+    p2u = p[23]
+    ib = p[24]
+    ki = p[25]
+    kd = p[26]
+    ka1 = p[27]
+    ka2 = p[28]
+    ksc = p[29]
+
+    dxdt = np.zeros(13)
+    d = cho * 1000.0  # g -> mg
+    insulin = insulin_rate * 6000.0 / bw  # U/min -> pmol/kg/min
+
+    # Glucose in the stomach
+    qsto = x[0] + x[1]
+    dbar = last_qsto + last_foodtaken * 1000.0  # unit: mg
+
+    # Stomach solid
+    dxdt[0] = -kmax * x[0] + d
+
+    if dbar > 0:
+        aa = 5.0 / 2.0 / (1.0 - b) / dbar
+        cc = 5.0 / 2.0 / d_param / dbar
+        kgut = kmin + (kmax - kmin) / 2.0 * (
+            np.tanh(aa * (qsto - b * dbar))
+            - np.tanh(cc * (qsto - d_param * dbar))
+            + 2.0
+        )
+    else:
+        kgut = kmax
+
+    # Stomach liquid
+    dxdt[1] = kmax * x[0] - x[1] * kgut
+
+    # Intestine
+    dxdt[2] = kgut * x[1] - kabs * x[2]
+
+    # Rate of appearance
+    rat = f * kabs * x[2] / bw
+    # Glucose production
+    egpt = kp1 - kp2 * x[3] - kp3 * x[8]
+    # Glucose utilization
+    uiit = fsnc
+
+    # Renal excretion
+    et = ke1 * (x[3] - ke2) if x[3] > ke2 else 0.0
+
+    # Glucose kinetics
+    dxdt[3] = max(egpt, 0.0) + rat - uiit - et - k1 * x[3] + k2 * x[4]
+    dxdt[3] = (x[3] >= 0) * dxdt[3]
+
+    vmt = vm0 + vmx * x[6]
+    kmt = km0
+    uidt = vmt * x[4] / (kmt + x[4])
+    dxdt[4] = -uidt + k1 * x[3] - k2 * x[4]
+    dxdt[4] = (x[4] >= 0) * dxdt[4]
+
+    # Insulin kinetics
+    dxdt[5] = -(m2 + m4) * x[5] + m1 * x[9] + ka1 * x[10] + ka2 * x[11]
+    it = x[5] / vi
+    dxdt[5] = (x[5] >= 0) * dxdt[5]
+
+    # Insulin action on glucose utilization
+    dxdt[6] = -p2u * x[6] + p2u * (it - ib)
+
+    # Insulin action on production
+    dxdt[7] = -ki * (x[7] - it)
+    dxdt[8] = -ki * (x[8] - x[7])
+
+    # Insulin in the liver (pmol/kg)
+    dxdt[9] = -(m1 + m30) * x[9] + m2 * x[5]
+    dxdt[9] = (x[9] >= 0) * dxdt[9]
+
+    # Subcutaneous insulin kinetics
+    dxdt[10] = insulin - (ka1 + kd) * x[10]
+    dxdt[10] = (x[10] >= 0) * dxdt[10]
+
+    dxdt[11] = kd * x[10] - ka2 * x[11]
+    dxdt[11] = (x[11] >= 0) * dxdt[11]
+
+    # Subcutaneous glucose
+    dxdt[12] = -ksc * x[12] + ksc * x[3]
+    dxdt[12] = (x[12] >= 0) * dxdt[12]
+
+    return dxdt
+
+
+@njit(cache=True, fastmath=True)
+def t1d_jac(  # noqa: C901, PLR0915
+    t: float,  # noqa: ARG001
+    x: np.ndarray,
+    p: np.ndarray,
+    last_qsto: float,
+    last_foodtaken: float,
+) -> np.ndarray:
+    """Analytic 13x13 Jacobian of `t1d_rhs` with respect to the state vector.
+
+    Supplied to the scipy integrator so that implicit steps use one closed-form
+    evaluation instead of ~13 finite-difference RHS calls. The non-negativity
+    gates on the states are treated as row gates, matching the RHS.
+    """
+    b = p[1]
+    d_param = p[2]
+    kmax = p[3]
+    kmin = p[4]
+    kabs = p[5]
+    f = p[6]
+    kp1 = p[7]
+    kp2 = p[8]
+    kp3 = p[9]
+    ke1 = p[11]
+    ke2 = p[12]
+    k1 = p[13]
+    k2 = p[14]
+    vm0 = p[15]
+    vmx = p[16]
+    km0 = p[17]
+    m1 = p[18]
+    m2 = p[19]
+    m30 = p[20]
+    m4 = p[21]
+    vi = p[22]
+    p2u = p[23]
+    ki = p[25]
+    kd = p[26]
+    ka1 = p[27]
+    ka2 = p[28]
+    ksc = p[29]
+    bw = p[0]
+
+    jac = np.zeros((13, 13))
+
+    # Meal subsystem: kgut depends on x[0] + x[1] through two tanh terms
+    qsto = x[0] + x[1]
+    dbar = last_qsto + last_foodtaken * 1000.0
+    if dbar > 0:
+        aa = 5.0 / 2.0 / (1.0 - b) / dbar
+        cc = 5.0 / 2.0 / d_param / dbar
+        tha = np.tanh(aa * (qsto - b * dbar))
+        thc = np.tanh(cc * (qsto - d_param * dbar))
+        kgut = kmin + (kmax - kmin) / 2.0 * (tha - thc + 2.0)
+        # d(kgut)/d(qsto); sech^2 = 1 - tanh^2
+        dkgut = (kmax - kmin) / 2.0 * (aa * (1.0 - tha * tha) - cc * (1.0 - thc * thc))
+    else:
+        kgut = kmax
+        dkgut = 0.0
+
+    jac[0, 0] = -kmax
+
+    jac[1, 0] = kmax - x[1] * dkgut
+    jac[1, 1] = -kgut - x[1] * dkgut
+
+    jac[2, 0] = x[1] * dkgut
+    jac[2, 1] = kgut + x[1] * dkgut
+    jac[2, 2] = -kabs
+
+    # Glucose kinetics
+    if x[3] >= 0:
+        egpt = kp1 - kp2 * x[3] - kp3 * x[8]
+        jac[3, 2] = f * kabs / bw
+        jac[3, 3] = -k1
+        if egpt > 0:
+            jac[3, 3] -= kp2
+            jac[3, 8] = -kp3
+        if x[3] > ke2:
+            jac[3, 3] -= ke1
+        jac[3, 4] = k2
+
+    if x[4] >= 0:
+        vmt = vm0 + vmx * x[6]
+        denom = km0 + x[4]
+        jac[4, 3] = k1
+        jac[4, 4] = -vmt * km0 / (denom * denom) - k2
+        jac[4, 6] = -vmx * x[4] / denom
+
+    # Insulin kinetics
+    if x[5] >= 0:
+        jac[5, 5] = -(m2 + m4)
+        jac[5, 9] = m1
+        jac[5, 10] = ka1
+        jac[5, 11] = ka2
+
+    jac[6, 5] = p2u / vi
+    jac[6, 6] = -p2u
+
+    jac[7, 5] = ki / vi
+    jac[7, 7] = -ki
+
+    jac[8, 7] = ki
+    jac[8, 8] = -ki
+
+    if x[9] >= 0:
+        jac[9, 5] = m2
+        jac[9, 9] = -(m1 + m30)
+
+    # Subcutaneous insulin kinetics
+    if x[10] >= 0:
+        jac[10, 10] = -(ka1 + kd)
+
+    if x[11] >= 0:
+        jac[11, 10] = kd
+        jac[11, 11] = -ka2
+
+    # Subcutaneous glucose
+    if x[12] >= 0:
+        jac[12, 3] = ksc
+        jac[12, 12] = -ksc
+
+    return jac
+
+
+@njit(cache=True, fastmath=True)
+def simulate_cgm_rk4(  # noqa: PLR0915
+    x0: np.ndarray,
+    p: np.ndarray,
+    meal_times: np.ndarray,
+    meal_amounts: np.ndarray,
+    cr: float,
+    cf: float,
+    target: float,
+    sim_minutes: float,
+    dt: float,
+    sample_minutes: float,
+) -> np.ndarray:
+    """Simulates a full noise-free CGM trace with a fixed-step RK4 integrator.
+
+    Replaces the whole simglucose env/controller/sensor loop with one compiled
+    kernel: the 13-state ODE is advanced with classic RK4 at step `dt` (the
+    model is non-stiff between meal events and the CGM is only sampled on a
+    fixed grid, so an adaptive implicit solver is overkill), meals are eaten at
+    `EAT_RATE` as in `T1DPatient._announce_meal`, and insulin approximates the
+    deterministic basal-bolus policy of `BBController` (basal from u2ss, a
+    meal bolus of amount/CR plus a correction above `CORRECTION_THRESHOLD`).
+    The approximation is not exact: each meal gets at most one correction
+    bolus, at announcement time, whereas `BBController` re-applies the
+    correction at every controller sample while the meal is still being
+    eaten. The returned trace is the subcutaneous glucose x[12]/Vg sampled
+    every `sample_minutes`, without the CGM sensor noise.
+
+    Parameters
+    ----------
+    x0 : np.ndarray
+        Initial 13-state vector of the patient.
+    p : np.ndarray
+        Flat parameter array in `PARAM_FIELDS` order.
+    meal_times : np.ndarray
+        Scheduled meal times in minutes from simulation start, ascending.
+    meal_amounts : np.ndarray
+        Carbohydrate amounts (g) of the scheduled meals.
+    cr : float
+        Carbohydrate ratio of the controller (g/U).
+    cf : float
+        Correction factor of the controller (mg/dL per U).
+    target : float
+        Target glucose of the controller (mg/dL).
+    sim_minutes : float
+        Total simulated time in minutes.
+    dt : float
+        Integration step in minutes.
+    sample_minutes : float
+        CGM sampling period in minutes.
+
+    Returns
+    -------
+    np.ndarray
+        CGM trace of length sim_minutes // sample_minutes + 1 (including t=0).
+
+    """
+    bw = p[0]
+    vg = p[30]
+    u2ss = p[31]
+    basal = u2ss * bw / 6000.0  # U/min, as in BBController._bb_policy
+
+    n_samples = int(sim_minutes // sample_minutes) + 1
+    out = np.empty(n_samples)
+    x = x0.copy()
+    out[0] = x[12] / vg
+
+    sample_i = 1
+    planned_meal = 0.0
+    last_qsto = x[0] + x[1]
+    last_foodtaken = 0.0
+    last_cho = 0.0
+    bolus_rate = 0.0
+    bolus_minutes_left = 0.0
+    next_meal = 0
+
+    n_steps = int(round(sim_minutes / dt))
+    t = 0.0
+    for _ in range(n_steps):
+        # Announce scheduled meals and compute the corresponding bolus,
+        # delivered over one controller sampling period.
+        while next_meal < meal_times.shape[0] and meal_times[next_meal] <= t + 1e-9:
+            amount = meal_amounts[next_meal]
+            planned_meal += amount
+            glucose = x[12] / vg
+            bolus = amount / cr
+            if glucose > CORRECTION_THRESHOLD:
+                bolus += (glucose - target) / cf
+            bolus_rate = bolus / sample_minutes
+            bolus_minutes_left = sample_minutes
+            next_meal += 1
+
+        # Eat the announced meals at EAT_RATE
+        if planned_meal > 0.0:
+            to_eat = min(EAT_RATE * dt, planned_meal)
+            cho = to_eat / dt
+            planned_meal -= to_eat
+        else:
+            cho = 0.0
+
+        if cho > 0.0 and last_cho <= 0.0:
+            last_qsto = x[0] + x[1]
+            last_foodtaken = 0.0
+        if cho > 0.0:
+            last_foodtaken += cho * dt
+        last_cho = cho
+
+        insulin = basal
+        if bolus_minutes_left > 0.0:
+            insulin += bolus_rate
+            bolus_minutes_left -= dt
+
+        # Classic RK4 step with the inputs held constant over dt
+        k1 = t1d_rhs(t, x, p, cho, insulin, last_qsto, last_foodtaken)
+        k2 = t1d_rhs(
+            t + dt / 2.0, x + dt / 2.0 * k1, p, cho, insulin, last_qsto, last_foodtaken
+        )
+        k3 = t1d_rhs(
+            t + dt / 2.0, x + dt / 2.0 * k2, p, cho, insulin, last_qsto, last_foodtaken
+        )
+        k4 = t1d_rhs(t + dt, x + dt * k3, p, cho, insulin, last_qsto, last_foodtaken)
+        x = x + dt / 6.0 * (k1 + 2.0 * k2 + 2.0 * k3 + k4)
+        t += dt
+
+        if sample_i < n_samples and t + 1e-9 >= sample_i * sample_minutes:
+            out[sample_i] = x[12] / vg
+            sample_i += 1
+
+    # Guard against floating-point drift in the time accumulator
+    while sample_i < n_samples:
+        out[sample_i] = x[12] / vg
+        sample_i += 1
+
+    return out
+
+
+@njit(cache=True, fastmath=True)
+def _t1d_rhs_soa(  # noqa: PLR0915
+    x: np.ndarray,
+    p: np.ndarray,
+    cho: np.ndarray,
+    insulin_rate: np.ndarray,
+    last_qsto: np.ndarray,
+    last_foodtaken: np.ndarray,
+    dxdt: np.ndarray,
+) -> None:
+    """Structure-of-arrays version of `t1d_rhs` over a simulation block.
+
+    `x`, `p` and `dxdt` are laid out (state/param, n_simulations) in float32,
+    so every term is an elementwise op over the contiguous batch dimension and
+    LLVM vectorizes it into packed FMA lanes. Keep in sync with `t1d_rhs`.
+    """
+    zero = np.float32(0.0)
+    one = np.float32(1.0)
+    two = np.float32(2.0)
+    half = np.float32(0.5)
+    thousand = np.float32(1000.0)
+    bw = p[0]
+    b = p[1]
+    d_param = p[2]
+    kmax = p[3]
+    kmin = p[4]
+    kabs = p[5]
+    f = p[6]
+    kp1 = p[7]
+    kp2 = p[8]
+    kp3 = p[9]
+    fsnc = p[10]
+    ke1 = p[11]
+    ke2 = p[12]
+    k1 = p[13]
+    k2 = p[14]
+    vm0 = p[15]
+    vmx = p[16]
+    km0 = p[17]
+    m1 = p[18]
+    m2 = p[19]
+    m30 = p[20]
+    m4 = p[21]
+    vi = p[22]
+    p2u = p[23]
+    ib = p[24]
+    ki = p[25]
+    kd = p[26]
+    ka1 = p[27]
+    ka2 = p[28]
+    ksc = p[29]
+
+    zeros = np.zeros(x.shape[1], dtype=np.float32)
+    d = cho * thousand
+    insulin = insulin_rate * np.float32(6000.0) / bw
+
+    qsto = x[0] + x[1]
+    dbar = last_qsto + last_foodtaken * thousand
+
+    dxdt[0, :] = -kmax * x[0] + d
+
+    fed = dbar > zero
+    safe_dbar = np.where(fed, dbar, one + zeros)
+    aa = np.float32(2.5) / (one - b) / safe_dbar
+    cc = np.float32(2.5) / d_param / safe_dbar
+    kgut = np.where(
+        fed,
+        kmin
+        + (kmax - kmin)
+        * half
+        * (
+            np.tanh(aa * (qsto - b * dbar))
+            - np.tanh(cc * (qsto - d_param * dbar))
+            + two
+        ),
+        kmax,
+    )
+
+    dxdt[1, :] = kmax * x[0] - x[1] * kgut
+    dxdt[2, :] = kgut * x[1] - kabs * x[2]
+
+    rat = f * kabs * x[2] / bw
+    egpt = kp1 - kp2 * x[3] - kp3 * x[8]
+    et = np.where(x[3] > ke2, ke1 * (x[3] - ke2), zeros)
+
+    dxdt[3, :] = (x[3] >= zero) * (
+        np.maximum(egpt, zeros) + rat - fsnc - et - k1 * x[3] + k2 * x[4]
+    )
+
+    vmt = vm0 + vmx * x[6]
+    uidt = vmt * x[4] / (km0 + x[4])
+    dxdt[4, :] = (x[4] >= zero) * (-uidt + k1 * x[3] - k2 * x[4])
+
+    it = x[5] / vi
+    dxdt[5, :] = (x[5] >= zero) * (
+        -(m2 + m4) * x[5] + m1 * x[9] + ka1 * x[10] + ka2 * x[11]
+    )
+
+    dxdt[6, :] = -p2u * x[6] + p2u * (it - ib)
+    dxdt[7, :] = -ki * (x[7] - it)
+    dxdt[8, :] = -ki * (x[8] - x[7])
+    dxdt[9, :] = (x[9] >= zero) * (-(m1 + m30) * x[9] + m2 * x[5])
+    dxdt[10, :] = (x[10] >= zero) * (insulin - (ka1 + kd) * x[10])
+    dxdt[11, :] = (x[11] >= zero) * (kd * x[10] - ka2 * x[11])
+    dxdt[12, :] = (x[12] >= zero) * (-ksc * x[12] + ksc * x[3])
+
+
+@njit(cache=True, fastmath=True)
+def _simulate_cgm_rk4_block(  # noqa: PLR0915
+    x0: np.ndarray,
+    p: np.ndarray,
+    meal_times: np.ndarray,
+    meal_amounts: np.ndarray,
+    cr: float,
+    cf: float,
+    target: float,
+    sim_minutes: float,
+    dt: float,
+    sample_minutes: float,
+    out: np.ndarray,
+) -> None:
+    """Advances one SoA block of simulations through the full RK4 time loop.
+
+    Mirrors `simulate_cgm_rk4` step for step, but every scalar of the
+    per-simulation state (planned meal, bolus rate, eating bookkeeping, the
+    13 ODE states) is a float32 vector over the block, so each timestep is a
+    handful of vectorized sweeps instead of `n` interpreted loops. Meal times
+    are shared by the whole batch, so announcement timing stays scalar.
+    """
+    n = p.shape[1]
+    zero = np.float32(0.0)
+    two = np.float32(2.0)
+    dt32 = np.float32(dt)
+    half_dt = np.float32(dt / 2.0)
+    sixth_dt = np.float32(dt / 6.0)
+    eat_step = np.float32(EAT_RATE * dt)
+    cr32 = np.float32(cr)
+    cf32 = np.float32(cf)
+    target32 = np.float32(target)
+    sample32 = np.float32(sample_minutes)
+    threshold32 = np.float32(CORRECTION_THRESHOLD)
+
+    x = np.empty((13, n), dtype=np.float32)
+    for j in range(13):
+        x[j, :] = x0[j]
+    x_stage = np.empty((13, n), dtype=np.float32)
+    k1 = np.empty((13, n), dtype=np.float32)
+    k2 = np.empty((13, n), dtype=np.float32)
+    k3 = np.empty((13, n), dtype=np.float32)
+    k4 = np.empty((13, n), dtype=np.float32)
+
+    bw = p[0]
+    vg = p[30]
+    basal = p[31] * bw / np.float32(6000.0)
+
+    n_samples = out.shape[0]
+    out[0, :] = x[12] / vg
+
+    sample_i = 1
+    zeros = np.zeros(n, dtype=np.float32)
+    planned_meal = np.zeros(n, dtype=np.float32)
+    last_qsto = x[0] + x[1]
+    last_foodtaken = np.zeros(n, dtype=np.float32)
+    last_cho: np.ndarray = np.zeros(n, dtype=np.float32)
+    bolus_rate = np.zeros(n, dtype=np.float32)
+    bolus_minutes_left = 0.0
+    next_meal = 0
+
+    n_steps = int(round(sim_minutes / dt))
+    t = 0.0
+    for _ in range(n_steps):
+        while next_meal < meal_times.shape[0] and meal_times[next_meal] <= t + 1e-9:
+            amount = meal_amounts[next_meal]
+            planned_meal += amount
+            glucose = x[12] / vg
+            bolus = amount / cr32 + np.where(
+                glucose > threshold32, (glucose - target32) / cf32, zeros
+            )
+            bolus_rate = bolus / sample32
+            bolus_minutes_left = sample_minutes
+            next_meal += 1
+
+        to_eat = np.minimum(planned_meal, eat_step)
+        cho = to_eat / dt32
+        planned_meal -= to_eat
+
+        eating = cho > zero
+        new_meal = eating & (last_cho <= zero)
+        last_qsto = np.where(new_meal, x[0] + x[1], last_qsto)
+        last_foodtaken = np.where(new_meal, zeros, last_foodtaken)
+        last_foodtaken = last_foodtaken + np.where(eating, cho * dt32, zeros)
+        last_cho = cho
+
+        if bolus_minutes_left > 0.0:
+            insulin = basal + bolus_rate
+            bolus_minutes_left -= dt
+        else:
+            insulin = basal + zeros
+
+        _t1d_rhs_soa(x, p, cho, insulin, last_qsto, last_foodtaken, k1)
+        x_stage[:, :] = x + half_dt * k1
+        _t1d_rhs_soa(x_stage, p, cho, insulin, last_qsto, last_foodtaken, k2)
+        x_stage[:, :] = x + half_dt * k2
+        _t1d_rhs_soa(x_stage, p, cho, insulin, last_qsto, last_foodtaken, k3)
+        x_stage[:, :] = x + dt32 * k3
+        _t1d_rhs_soa(x_stage, p, cho, insulin, last_qsto, last_foodtaken, k4)
+        x += sixth_dt * (k1 + two * k2 + two * k3 + k4)
+        t += dt
+
+        if sample_i < n_samples and t + 1e-9 >= sample_i * sample_minutes:
+            out[sample_i, :] = x[12] / vg
+            sample_i += 1
+
+    # Guard against floating-point drift in the time accumulator
+    while sample_i < n_samples:
+        out[sample_i, :] = x[12] / vg
+        sample_i += 1
+
+
+@njit(cache=True, fastmath=True, parallel=True)
+def _simulate_cgm_rk4_soa(
+    x0: np.ndarray,
+    params_soa: np.ndarray,
+    meal_times: np.ndarray,
+    meal_amounts_soa: np.ndarray,
+    cr: float,
+    cf: float,
+    target: float,
+    sim_minutes: float,
+    dt: float,
+    sample_minutes: float,
+    out: np.ndarray,
+) -> None:
+    """Splits the batch into `_SOA_BLOCK`-wide blocks and pranges over them.
+
+    Threads take whole blocks, SIMD takes the lanes within a block, so the
+    kernel scales across cores and vector width at the same time.
+    """
+    n_simulations = params_soa.shape[1]
+    n_blocks = (n_simulations + _SOA_BLOCK - 1) // _SOA_BLOCK
+    for blk in prange(n_blocks):  # type: ignore[attr-defined]
+        start = blk * _SOA_BLOCK
+        stop = min(start + _SOA_BLOCK, n_simulations)
+        _simulate_cgm_rk4_block(
+            x0,
+            params_soa[:, start:stop],
+            meal_times,
+            meal_amounts_soa[:, start:stop],
+            cr,
+            cf,
+            target,
+            sim_minutes,
+            dt,
+            sample_minutes,
+            out[:, start:stop],
+        )
+
+
+#: Meal-count specializations are only generated for realistic daily
+#: schedules; longer ones fall back to the generic ("compact") kernel, whose
+#: code size does not grow with the schedule.
+_MAX_SPECIALIZED_MEALS = 8
+
+#: One compiled batch kernel per meal count, built lazily on first use.
+_MEAL_SPECIALIZED_KERNELS: dict[int, Callable[..., None]] = {}
+
+
+def _make_meal_specialized_soa(n_meals: int) -> Callable[..., None]:  # noqa: C901, PLR0915
+    """Builds an SoA batch kernel specialized on a fixed meal count.
+
+    `n_meals` is captured as a closure constant, so the meal-announcement
+    loop gets a compile-time bound that LLVM fully unrolls: each timestep is
+    straight-line code with the per-meal checks laid out inline instead of a
+    data-dependent while-loop. Within a batch the schedule length is fixed,
+    so one specialization serves every theta. Closures cannot use the
+    on-disk cache, so each variant compiles once per process on first use.
+    Keep the body in sync with `_simulate_cgm_rk4_block`.
+    """
+
+    @njit(fastmath=True)
+    def block(  # noqa: PLR0915
+        x0: np.ndarray,
+        p: np.ndarray,
+        meal_times: np.ndarray,
+        meal_amounts: np.ndarray,
+        cr: float,
+        cf: float,
+        target: float,
+        sim_minutes: float,
+        dt: float,
+        sample_minutes: float,
+        out: np.ndarray,
+    ) -> None:
+        n = p.shape[1]
+        zero = np.float32(0.0)
+        two = np.float32(2.0)
+        dt32 = np.float32(dt)
+        half_dt = np.float32(dt / 2.0)
+        sixth_dt = np.float32(dt / 6.0)
+        eat_step = np.float32(EAT_RATE * dt)
+        cr32 = np.float32(cr)
+        cf32 = np.float32(cf)
+        target32 = np.float32(target)
+        sample32 = np.float32(sample_minutes)
+        threshold32 = np.float32(CORRECTION_THRESHOLD)
+
+        x = np.empty((13, n), dtype=np.float32)
+        for j in range(13):
+            x[j, :] = x0[j]
+        x_stage = np.empty((13, n), dtype=np.float32)
+        k1 = np.empty((13, n), dtype=np.float32)
+        k2 = np.empty((13, n), dtype=np.float32)
+        k3 = np.empty((13, n), dtype=np.float32)
+        k4 = np.empty((13, n), dtype=np.float32)
+
+        bw = p[0]
+        vg = p[30]
+        basal = p[31] * bw / np.float32(6000.0)
+
+        n_samples = out.shape[0]
+        out[0, :] = x[12] / vg
+
+        sample_i = 1
+        zeros = np.zeros(n, dtype=np.float32)
+        planned_meal = np.zeros(n, dtype=np.float32)
+        last_qsto = x[0] + x[1]
+        last_foodtaken = np.zeros(n, dtype=np.float32)
+        last_cho: np.ndarray = np.zeros(n, dtype=np.float32)
+        bolus_rate = np.zeros(n, dtype=np.float32)
+        bolus_minutes_left = 0.0
+        next_meal = 0
+
+        n_steps = int(round(sim_minutes / dt))
+        t = 0.0
+        for _ in range(n_steps):
+            # Constant trip count: LLVM unrolls the announcement checks
+            for m in range(n_meals):
+                if m == next_meal and meal_times[m] <= t + 1e-9:
+                    amount = meal_amounts[m]
+                    planned_meal += amount
+                    glucose = x[12] / vg
+                    bolus = amount / cr32 + np.where(
+                        glucose > threshold32, (glucose - target32) / cf32, zeros
+                    )
+                    bolus_rate = bolus / sample32
+                    bolus_minutes_left = sample_minutes
+                    next_meal += 1
+
+            to_eat = np.minimum(planned_meal, eat_step)
+            cho = to_eat / dt32
+            planned_meal -= to_eat
+
+            eating = cho > zero
+            new_meal = eating & (last_cho <= zero)
+            last_qsto = np.where(new_meal, x[0] + x[1], last_qsto)
+            last_foodtaken = np.where(new_meal, zeros, last_foodtaken)
+            last_foodtaken = last_foodtaken + np.where(eating, cho * dt32, zeros)
+            last_cho = cho
+
+            if bolus_minutes_left > 0.0:
+                insulin = basal + bolus_rate
+                bolus_minutes_left -= dt
+            else:
+                insulin = basal + zeros
+
+            _t1d_rhs_soa(x, p, cho, insulin, last_qsto, last_foodtaken, k1)
+            x_stage[:, :] = x + half_dt * k1
+            _t1d_rhs_soa(x_stage, p, cho, insulin, last_qsto, last_foodtaken, k2)
+            x_stage[:, :] = x + half_dt * k2
+            _t1d_rhs_soa(x_stage, p, cho, insulin, last_qsto, last_foodtaken, k3)
+            x_stage[:, :] = x + dt32 * k3
+            _t1d_rhs_soa(x_stage, p, cho, insulin, last_qsto, last_foodtaken, k4)
+            x += sixth_dt * (k1 + two * k2 + two * k3 + k4)
+            t += dt
+
+            if sample_i < n_samples and t + 1e-9 >= sample_i * sample_minutes:
+                out[sample_i, :] = x[12] / vg
+                sample_i += 1
+
+        while sample_i < n_samples:
+            out[sample_i, :] = x[12] / vg
+            sample_i += 1
+
+    @njit(fastmath=True, parallel=True)
+    def batch(
+        x0: np.ndarray,
+        params_soa: np.ndarray,
+        meal_times: np.ndarray,
+        meal_amounts_soa: np.ndarray,
+        cr: float,
+        cf: float,
+        target: float,
+        sim_minutes: float,
+        dt: float,
+        sample_minutes: float,
+        out: np.ndarray,
+    ) -> None:
+        n_simulations = params_soa.shape[1]
+        n_blocks = (n_simulations + _SOA_BLOCK - 1) // _SOA_BLOCK
+        for blk in prange(n_blocks):  # type: ignore[attr-defined]
+            start = blk * _SOA_BLOCK
+            stop = min(start + _SOA_BLOCK, n_simulations)
+            block(
+                x0,
+                params_soa[:, start:stop],
+                meal_times,
+                meal_amounts_soa[:, start:stop],
+                cr,
+                cf,
+                target,
+                sim_minutes,
+                dt,
+                sample_minutes,
+                out[:, start:stop],
+            )
+
+    return batch
+
+
+def _soa_kernel_for(n_meals: int) -> Callable[..., None]:
+    """Returns the batch kernel to use for a given meal-schedule length.
+
+    Schedules of up to `_MAX_SPECIALIZED_MEALS` meals get a kernel with the
+    announcement loop unrolled over the exact meal count; empty or oversized
+    schedules use the generic cached kernel (the "compact mode" fallback).
+    """
+    if not 0 < n_meals <= _MAX_SPECIALIZED_MEALS:
+        return _simulate_cgm_rk4_soa
+    kernel = _MEAL_SPECIALIZED_KERNELS.get(n_meals)
+    if kernel is None:
+        kernel = _make_meal_specialized_soa(n_meals)
+        _MEAL_SPECIALIZED_KERNELS[n_meals] = kernel
+    return kernel
+
+
+def simulate_cgm_rk4_batch(
+    x0: np.ndarray,
+    params_batch: np.ndarray,
+    meal_times: np.ndarray,
+    meal_amounts_batch: np.ndarray,
+    cr: float,
+    cf: float,
+    target: float,
+    sim_minutes: float,
+    dt: float,
+    sample_minutes: float,
+) -> np.ndarray:
+    """Simulates a whole theta batch with the float32 SoA RK4 kernel.
+
+    The CGM has 1 mg/dL resolution, so float64 state buys nothing here;
+    float32 halves the bytes touched and doubles the SIMD lane count. Inputs
+    arrive in the natural (N, ...) layout and are transposed once into
+    (param/meal, N) structure-of-arrays form so the compiled kernel streams
+    contiguously across the batch dimension.
+
+    Parameters
+    ----------
+    x0 : np.ndarray
+        Initial 13-state vector, shared by all simulations.
+    params_batch : np.ndarray
+        Per-simulation parameter arrays of shape (N, len(PARAM_FIELDS)).
+    meal_times : np.ndarray
+        Scheduled meal times in minutes from simulation start, ascending.
+    meal_amounts_batch : np.ndarray
+        Per-simulation carbohydrate amounts of shape (N, len(meal_times)).
+    cr, cf, target, sim_minutes, dt, sample_minutes : float
+        As in `simulate_cgm_rk4`.
+
+    Returns
+    -------
+    np.ndarray
+        float32 CGM traces of shape (N, sim_minutes // sample_minutes + 1).
+
+    """
+    n_simulations = params_batch.shape[0]
+    n_samples = int(sim_minutes // sample_minutes) + 1
+    params_soa = np.ascontiguousarray(params_batch.T, dtype=np.float32)
+    meal_amounts_soa = np.ascontiguousarray(meal_amounts_batch.T, dtype=np.float32)
+    out_soa = np.empty((n_samples, n_simulations), dtype=np.float32)
+    kernel = _soa_kernel_for(meal_times.shape[0])
+    kernel(
+        np.asarray(x0, dtype=np.float32),
+        params_soa,
+        np.asarray(meal_times, dtype=np.float64),
+        meal_amounts_soa,
+        float(cr),
+        float(cf),
+        float(target),
+        float(sim_minutes),
+        float(dt),
+        float(sample_minutes),
+        out_soa,
+    )
+    return np.ascontiguousarray(out_soa.T)
+
+
+@cuda.jit(device=True)
+def _t1d_rhs_device(  # noqa: PLR0915
+    x: np.ndarray,
+    p: np.ndarray,
+    cho: float,
+    insulin_rate: float,
+    last_qsto: float,
+    last_foodtaken: float,
+    dxdt: np.ndarray,
+) -> None:
+    """CUDA device version of `t1d_rhs`, writing the derivative into `dxdt`.
+
+    Device functions cannot allocate arrays, so the equations are duplicated
+    here in scalar form; keep in sync with `t1d_rhs`.
+    """
+    bw = p[0]
+    b = p[1]
+    d_param = p[2]
+    kmax = p[3]
+    kmin = p[4]
+    kabs = p[5]
+    f = p[6]
+    kp1 = p[7]
+    kp2 = p[8]
+    kp3 = p[9]
+    fsnc = p[10]
+    ke1 = p[11]
+    ke2 = p[12]
+    k1 = p[13]
+    k2 = p[14]
+    vm0 = p[15]
+    vmx = p[16]
+    km0 = p[17]
+    m1 = p[18]
+    m2 = p[19]
+    m30 = p[20]
+    m4 = p[21]
+    vi = p[22]
+    p2u = p[23]
+    ib = p[24]
+    ki = p[25]
+    kd = p[26]
+    ka1 = p[27]
+    ka2 = p[28]
+    ksc = p[29]
+
+    d = cho * 1000.0
+    insulin = insulin_rate * 6000.0 / bw
+
+    qsto = x[0] + x[1]
+    dbar = last_qsto + last_foodtaken * 1000.0
+
+    dxdt[0] = -kmax * x[0] + d
+
+    if dbar > 0.0:
+        aa = 5.0 / 2.0 / (1.0 - b) / dbar
+        cc = 5.0 / 2.0 / d_param / dbar
+        kgut = kmin + (kmax - kmin) / 2.0 * (
+            math.tanh(aa * (qsto - b * dbar))
+            - math.tanh(cc * (qsto - d_param * dbar))
+            + 2.0
+        )
+    else:
+        kgut = kmax
+
+    dxdt[1] = kmax * x[0] - x[1] * kgut
+    dxdt[2] = kgut * x[1] - kabs * x[2]
+
+    rat = f * kabs * x[2] / bw
+    egpt = kp1 - kp2 * x[3] - kp3 * x[8]
+    et = ke1 * (x[3] - ke2) if x[3] > ke2 else 0.0
+
+    dxdt[3] = max(egpt, 0.0) + rat - fsnc - et - k1 * x[3] + k2 * x[4]
+    if x[3] < 0.0:
+        dxdt[3] = 0.0
+
+    vmt = vm0 + vmx * x[6]
+    uidt = vmt * x[4] / (km0 + x[4])
+    dxdt[4] = -uidt + k1 * x[3] - k2 * x[4]
+    if x[4] < 0.0:
+        dxdt[4] = 0.0
+
+    dxdt[5] = -(m2 + m4) * x[5] + m1 * x[9] + ka1 * x[10] + ka2 * x[11]
+    it = x[5] / vi
+    if x[5] < 0.0:
+        dxdt[5] = 0.0
+
+    dxdt[6] = -p2u * x[6] + p2u * (it - ib)
+    dxdt[7] = -ki * (x[7] - it)
+    dxdt[8] = -ki * (x[8] - x[7])
+
+    dxdt[9] = -(m1 + m30) * x[9] + m2 * x[5]
+    if x[9] < 0.0:
+        dxdt[9] = 0.0
+
+    dxdt[10] = insulin - (ka1 + kd) * x[10]
+    if x[10] < 0.0:
+        dxdt[10] = 0.0
+
+    dxdt[11] = kd * x[10] - ka2 * x[11]
+    if x[11] < 0.0:
+        dxdt[11] = 0.0
+
+    dxdt[12] = -ksc * x[12] + ksc * x[3]
+    if x[12] < 0.0:
+        dxdt[12] = 0.0
+
+
+@cuda.jit
+def _simulate_cgm_rk4_cuda(  # noqa: C901, PLR0912, PLR0915
+    x0: np.ndarray,
+    params_batch: np.ndarray,
+    meal_times: np.ndarray,
+    meal_amounts_batch: np.ndarray,
+    cr: float,
+    cf: float,
+    target: float,
+    sim_minutes: float,
+    dt: float,
+    sample_minutes: float,
+    out: np.ndarray,
+) -> None:
+    """CUDA kernel: one thread integrates one theta with RK4 in registers/local
+    memory and writes only the CGM samples to global memory. Mirrors
+    `simulate_cgm_rk4`.
+    """
+    i: int = cuda.grid(1)  # type: ignore[call-arg]
+    if i >= params_batch.shape[0]:
+        return
+
+    p = params_batch[i]
+    x = cuda.local.array(13, np.float32)
+    x_stage = cuda.local.array(13, np.float32)
+    k1 = cuda.local.array(13, np.float32)
+    k2 = cuda.local.array(13, np.float32)
+    k3 = cuda.local.array(13, np.float32)
+    k4 = cuda.local.array(13, np.float32)
+    for j in range(13):
+        x[j] = x0[j]
+
+    bw = p[0]
+    vg = p[30]
+    u2ss = p[31]
+    basal = u2ss * bw / 6000.0
+
+    n_samples = out.shape[1]
+    out[i, 0] = x[12] / vg
+    sample_i = 1
+    planned_meal = 0.0
+    last_qsto = x[0] + x[1]
+    last_foodtaken = 0.0
+    last_cho = 0.0
+    bolus_rate = 0.0
+    bolus_minutes_left = 0.0
+    next_meal = 0
+
+    n_steps = int(sim_minutes / dt + 0.5)
+    t = 0.0
+    for _ in range(n_steps):
+        while next_meal < meal_times.shape[0] and meal_times[next_meal] <= t + 1e-3:
+            amount = meal_amounts_batch[i, next_meal]
+            planned_meal += amount
+            glucose = x[12] / vg
+            bolus = amount / cr
+            if glucose > CORRECTION_THRESHOLD:
+                bolus += (glucose - target) / cf
+            bolus_rate = bolus / sample_minutes
+            bolus_minutes_left = sample_minutes
+            next_meal += 1
+
+        if planned_meal > 0.0:
+            to_eat = min(EAT_RATE * dt, planned_meal)
+            cho = to_eat / dt
+            planned_meal -= to_eat
+        else:
+            cho = 0.0
+
+        if cho > 0.0 and last_cho <= 0.0:
+            last_qsto = x[0] + x[1]
+            last_foodtaken = 0.0
+        if cho > 0.0:
+            last_foodtaken += cho * dt
+        last_cho = cho
+
+        insulin = basal
+        if bolus_minutes_left > 0.0:
+            insulin += bolus_rate
+            bolus_minutes_left -= dt
+
+        _t1d_rhs_device(x, p, cho, insulin, last_qsto, last_foodtaken, k1)
+        for j in range(13):
+            x_stage[j] = x[j] + dt / 2.0 * k1[j]
+        _t1d_rhs_device(x_stage, p, cho, insulin, last_qsto, last_foodtaken, k2)
+        for j in range(13):
+            x_stage[j] = x[j] + dt / 2.0 * k2[j]
+        _t1d_rhs_device(x_stage, p, cho, insulin, last_qsto, last_foodtaken, k3)
+        for j in range(13):
+            x_stage[j] = x[j] + dt * k3[j]
+        _t1d_rhs_device(x_stage, p, cho, insulin, last_qsto, last_foodtaken, k4)
+        for j in range(13):
+            x[j] = x[j] + dt / 6.0 * (k1[j] + 2.0 * k2[j] + 2.0 * k3[j] + k4[j])
+        t += dt
+
+        if sample_i < n_samples and t + 1e-3 >= sample_i * sample_minutes:
+            out[i, sample_i] = x[12] / vg
+            sample_i += 1
+
+    while sample_i < n_samples:
+        out[i, sample_i] = x[12] / vg
+        sample_i += 1
+
+
+def cuda_available() -> bool:
+    """Whether a CUDA device is usable for the batched kernel."""
+    try:
+        return bool(cuda.is_available())
+    except (cuda.CudaSupportError, RuntimeError):
+        return False
+
+
+def simulate_cgm_rk4_batch_cuda(
+    x0: np.ndarray,
+    params_batch: np.ndarray,
+    meal_times: np.ndarray,
+    meal_amounts_batch: np.ndarray,
+    cr: float,
+    cf: float,
+    target: float,
+    sim_minutes: float,
+    dt: float,
+    sample_minutes: float,
+) -> "DeviceNDArray":
+    """Launches the CUDA RK4 kernel over a theta batch.
+
+    Arguments are the same as for `simulate_cgm_rk4_batch`. One thread per
+    parameter set; the returned device array exposes
+    `__cuda_array_interface__`, so torch can wrap it without a host
+    round-trip (`torch.as_tensor(result, device="cuda")`).
+
+    Returns
+    -------
+    DeviceNDArray
+        float32 CGM traces of shape (N, sim_minutes // sample_minutes + 1),
+        resident on the GPU.
+
+    """
+    n_simulations = params_batch.shape[0]
+    n_samples = int(sim_minutes // sample_minutes) + 1
+    out_device = cuda.device_array((n_simulations, n_samples), dtype=np.float32)
+    threads_per_block = 128
+    blocks = (n_simulations + threads_per_block - 1) // threads_per_block
+    _simulate_cgm_rk4_cuda[blocks, threads_per_block](
+        cuda.to_device(np.ascontiguousarray(x0, dtype=np.float32)),
+        cuda.to_device(np.ascontiguousarray(params_batch, dtype=np.float32)),
+        cuda.to_device(np.ascontiguousarray(meal_times, dtype=np.float32)),
+        cuda.to_device(np.ascontiguousarray(meal_amounts_batch, dtype=np.float32)),
+        np.float32(cr),
+        np.float32(cf),
+        np.float32(target),
+        np.float32(sim_minutes),
+        np.float32(dt),
+        np.float32(sample_minutes),
+        out_device,
+    )
+    return out_device
+
+
+def warm_up(*, parallel: bool = True) -> None:
+    """Trigger JIT compilation of the CPU kernels with dummy inputs.
+
+    Every kernel is declared with `cache=True`, so the first call per machine
+    writes the compiled machine code next to this module and later calls —
+    including freshly started worker processes — load it from disk instead of
+    re-running LLVM codegen. Called in the parent before the pool forks (so
+    workers inherit warm dispatchers) and from the pool initializer as a
+    safety net; `python -m glucose_sbi.t1d_kernels` populates the cache ahead
+    of time, e.g. in CI or a container build.
+
+    With `parallel=False` only the serial kernels are warmed: running the
+    `parallel=True` batch driver starts numba's threading layer, and forking
+    after that can deadlock the children, so a process that is about to fork
+    workers must leave the batch driver to the workers' own warm-up.
+    """
+    x = np.zeros(13)
+    p = np.ones(len(PARAM_FIELDS))
+    t1d_rhs(0.0, x, p, 0.0, 0.0, 0.0, 0.0)
+    t1d_jac(0.0, x, p, 0.0, 0.0)
+    meal_times = np.zeros(0)
+    meal_amounts = np.zeros(0)
+    simulate_cgm_rk4(x, p, meal_times, meal_amounts, 13.5, 23.52, 140.0, 3.0, 1.0, 3.0)
+    if not parallel:
+        return
+    simulate_cgm_rk4_batch(
+        x,
+        p.reshape(1, -1),
+        meal_times,
+        np.zeros((1, 0)),
+        13.5,
+        23.52,
+        140.0,
+        3.0,
+        1.0,
+        3.0,
+    )
+
+
+if __name__ == "__main__":
+    # Populate the on-disk kernel cache ahead of time (CI, container builds):
+    #     python -m glucose_sbi.t1d_kernels
+    tic = time.perf_counter()
+    warm_up()
+    print(  # noqa: T201
+        f"t1d kernels compiled and cached in {time.perf_counter() - tic:.1f} s"
+    )